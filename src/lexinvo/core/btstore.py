@@ -34,6 +34,10 @@ def apply_patch(invoice: CanonicalInvoice, patch: Patch) -> None:
     record.derivation = patch.derivation
     record.rule_id = patch.rule_id
     record.evidence = patch.evidence
+    if patch.scope == "totals":
+        invoice.totals_cache.pop(patch.bt, None)
+    elif patch.scope == "line":
+        invoice.lines_cache = None
 
     invoice.patches.append(
         {
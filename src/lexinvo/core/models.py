@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Literal, Optional
 
+from lexinvo.utils.normalize import parse_decimal
+
 
 @dataclass
 class BTValue:
@@ -54,3 +56,12 @@ class CanonicalInvoice:
     totals: Dict[str, BTValue]
     raw: dict
     patches: List[dict]
+    # Parsed totals and line aggregates shared by the rule phases; reset by apply_patch.
+    totals_cache: Dict[str, Optional[float]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    lines_cache: Any = field(default=None, init=False, repr=False, compare=False)
+
+    def get_total_decimal(self, bt: str) -> Optional[float]:
+        if bt not in self.totals_cache:
+            record = self.totals.get(bt)
+            self.totals_cache[bt] = parse_decimal(record.value) if record else None
+        return self.totals_cache[bt]
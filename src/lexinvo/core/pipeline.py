@@ -12,8 +12,17 @@ from lexinvo.core.gpt_enrich import enrich_with_gpt
 from lexinvo.core.loader import load_azure
 from lexinvo.core.pdf_audit import audit_and_enrich
 from lexinvo.core.report import build_report
-from lexinvo.core.rules_engine import phase1_normalize, phase2_derive, phase3_validate, phase4_resolve
+from lexinvo.core.rules_engine import (
+    PHASE2_INPUT_BTS,
+    PHASE3_INPUT_BTS,
+    inputs_patched_since,
+    phase1_normalize,
+    phase2_derive,
+    phase3_validate,
+    phase4_resolve,
+)
 from lexinvo.core.models import CanonicalLine
+from lexinvo.utils.fileio import write_bytes_atomic
 
 
 def _load_json(path: Path) -> Dict[str, Any]:
@@ -23,7 +32,7 @@ def _load_json(path: Path) -> Dict[str, Any]:
 
 
 def _write_json(path: Path, payload: Any) -> None:
-    path.write_text(json.dumps(payload, indent=2, ensure_ascii=True), encoding="utf-8")
+    write_bytes_atomic(path, json.dumps(payload, indent=2, ensure_ascii=True).encode("utf-8"))
 
 
 def run_pipeline(input_path: str | None, output_dir: str, config_dir: str, data_dir: str, pdf_path: str | None = None) -> None:
@@ -62,19 +71,24 @@ def run_pipeline(input_path: str | None, output_dir: str, config_dir: str, data_
     if not llm_only:
         for patch in phase1_normalize(invoice):
             apply_patch(invoice, patch)
+        phase2_mark = len(invoice.patches)
         for patch in phase2_derive(invoice):
             apply_patch(invoice, patch)
+        phase3_mark = len(invoice.patches)
         for patch in phase3_validate(invoice):
             apply_patch(invoice, patch)
         for patch in phase4_resolve(invoice):
             apply_patch(invoice, patch)
-        # Re-run derivations/validations that depend on Phase 4 signals (e.g., BT-81)
-        for patch in phase2_derive(invoice):
-            apply_patch(invoice, patch)
+        # Re-run derivations/validations that depend on Phase 4 signals (e.g., BT-81),
+        # skipping a phase when nothing it reads was patched since it last ran.
+        if inputs_patched_since(invoice, phase2_mark, PHASE2_INPUT_BTS):
+            for patch in phase2_derive(invoice):
+                apply_patch(invoice, patch)
         for patch in phase4_resolve(invoice):
             apply_patch(invoice, patch)
-        for patch in phase3_validate(invoice):
-            apply_patch(invoice, patch)
+        if inputs_patched_since(invoice, phase3_mark, PHASE3_INPUT_BTS):
+            for patch in phase3_validate(invoice):
+                apply_patch(invoice, patch)
 
     corrections_report = build_report(invoice)
 
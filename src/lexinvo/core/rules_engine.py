@@ -2,14 +2,46 @@
 
 from __future__ import annotations
 
+import re
+import time
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from lexinvo.core.models import BTValue, CanonicalInvoice, Patch
 from lexinvo.utils.normalize import normalize_country, normalize_email, normalize_vat_id, parse_date_to_iso, parse_decimal
 
 TOLERANCE = 0.02
 
+DE_DATE_RE = re.compile(r"\b(\d{2})\.(\d{2})\.(\d{4})\b")
+
+# Document-level charge labels in the totals block (BT-99)
+CHARGE_RE = re.compile(
+    r"\b(?:versand|versandkosten|porto|deklarierter wert|shipping|delivery charge|freight)\b",
+    re.IGNORECASE,
+)
+
+# Numeric line BTs read by the rules; parsed once per invoice state.
+LINE_DECIMAL_BTS = ("BT-129", "BT-131", "BT-138", "BT-146", "BT-147", "BT-152")
+
+# Every BT read by phase2_derive / phase3_validate (outputs included, since each rule
+# checks its target first); a re-run is only needed once one of these was patched.
+# Hand-maintained: add the inputs of every new rule here.
+PHASE2_INPUT_BTS = frozenset(
+    {
+        "BT-5", "BT-9", "BT-20", "BT-38", "BT-39", "BT-40", "BT-53", "BT-54", "BT-55",
+        "BT-67", "BT-68", "BT-72", "BT-78", "BT-79", "BT-80", "BT-81", "BT-92", "BT-94",
+        "BT-99", "BT-106", "BT-107", "BT-108", "BT-109", "BT-110", "BT-112", "BT-113",
+        "BT-115", "BT-116", "BT-126", "BT-151", *LINE_DECIMAL_BTS,
+    }
+)
+PHASE3_INPUT_BTS = frozenset(
+    {
+        "BT-92", "BT-99", "BT-106", "BT-107", "BT-108", "BT-109", "BT-110", "BT-112",
+        "BT-113", "BT-115", "BT-116", "BT-151", *LINE_DECIMAL_BTS,
+    }
+)
+
 DE_STATE_CODES = {
     "Baden-Württemberg": "DE-BW",
     "Bayern": "DE-BY",
@@ -234,6 +266,11 @@ def _bt(scope: Dict[str, BTValue], bt: str) -> Optional[BTValue]:
     return scope.get(bt)
 
 
+# ".2f" already rounds half-even on the exact value, same as round(x, 2) first.
+def _fmt2(value: float) -> str:
+    return format(value, ".2f")
+
+
 def _has_value(value: object) -> bool:
     if value is None:
         return False
@@ -245,8 +282,10 @@ def _has_value(value: object) -> bool:
 
 
 def _clean_amount(value: Optional[float]) -> Optional[float]:
+    # Rounds to cents and folds float noise around zero (incl. -0.0) to 0.0.
     if value is None:
         return None
+    value = round(value, 2)
     if abs(value) < 0.005:
         return 0.0
     return value
@@ -259,6 +298,78 @@ def _line(invoice: CanonicalInvoice, line_id: int) -> Optional[Dict[str, BTValue
     return None
 
 
+@dataclass
+class LineSummary:
+    # Parsed numeric line values per BT, index-aligned with invoice.lines.
+    columns: Dict[str, List[Optional[float]]]
+    net_sum: Optional[float]
+    net_after_allowance_sum: Optional[float]
+    allowance_sum: float
+    single_vat_category: bool
+    vat_rate: Optional[float]
+
+
+def _line_summary(invoice: CanonicalInvoice) -> LineSummary:
+    summary = invoice.lines_cache
+    if summary is None:
+        summary = _build_line_summary(invoice)
+        invoice.lines_cache = summary
+    return summary
+
+
+def _build_line_summary(invoice: CanonicalInvoice) -> LineSummary:
+    columns: Dict[str, List[Optional[float]]] = {bt: [] for bt in LINE_DECIMAL_BTS}
+    category = None
+    single_category = True
+    for line in invoice.lines:
+        bts = line.bt
+        for bt, column in columns.items():
+            record = bts.get(bt)
+            column.append(parse_decimal(record.value) if record else None)
+        # Category comparison stops once a second distinct value is seen.
+        bt151 = bts.get("BT-151")
+        if single_category and bt151 and bt151.value:
+            if category is None:
+                category = bt151.value
+            elif bt151.value != category:
+                single_category = False
+
+    net_values = []
+    net_after_allowance = []
+    allowance_sum = 0.0
+    for net, allowance, discount_pct in zip(columns["BT-131"], columns["BT-147"], columns["BT-138"]):
+        if allowance is not None:
+            allowance_sum += allowance
+        if net is None:
+            continue
+        net_values.append(net)
+        # If BT-131 likely pre-discount and line allowance exists, subtract it.
+        if discount_pct is None and allowance is not None:
+            net_after_allowance.append(net - allowance)
+        else:
+            net_after_allowance.append(net)
+
+    rate = None
+    for line_rate in columns["BT-152"]:
+        if line_rate is None:
+            continue
+        line_rate = round(line_rate, 2)
+        if rate is None:
+            rate = line_rate
+        elif line_rate != rate:
+            rate = None
+            break
+
+    return LineSummary(
+        columns=columns,
+        net_sum=sum(net_values) if net_values else None,
+        net_after_allowance_sum=sum(net_after_allowance) if net_after_allowance else None,
+        allowance_sum=allowance_sum,
+        single_vat_category=single_category,
+        vat_rate=rate,
+    )
+
+
 def _normalize_de_postcode(value: object) -> Optional[int]:
     if value is None:
         return None
@@ -307,6 +418,26 @@ def _make_patch(
     )
 
 
+def _dedup_leading_token(scope: Dict[str, BTValue], bt: str, derivation: str, rule_id: str) -> Optional[Patch]:
+    record = scope.get(bt)
+    if not record or not record.value or not isinstance(record.value, str):
+        return None
+    # Only the first two tokens matter; maxsplit avoids building the full token list.
+    tokens = record.value.split(None, 2)
+    if len(tokens) < 2 or tokens[0] != tokens[1]:
+        return None
+    return _make_patch(
+        "header",
+        bt,
+        tokens[0],
+        status="corrected",
+        source="rule",
+        derivation=derivation,
+        rule_id=rule_id,
+        evidence=record.evidence,
+    )
+
+
 def _extract_vat_id(value: object) -> Optional[str]:
     if value is None:
         return None
@@ -314,8 +445,6 @@ def _extract_vat_id(value: object) -> Optional[str]:
     if not text:
         return None
     # Prefer pattern: two letters followed by digits.
-    import re
-
     match = re.search(r"([A-Z]{2}\d+)", text)
     if match:
         return match.group(1)
@@ -328,8 +457,6 @@ def _extract_registration_id(value: object) -> Optional[str]:
     text = str(value)
     if not text.strip():
         return None
-    import re
-
     match = re.search(r"\b(HR[AB]\s*\d+)\b", text)
     if match:
         return match.group(1).strip()
@@ -344,8 +471,6 @@ def _normalize_tax_registration(value: object) -> Optional[str]:
     if not text:
         return None
     # Remove labels like "Nr." and keep digits with separators.
-    import re
-
     text = re.sub(r"\bNr\.?\b", "", text, flags=re.IGNORECASE).strip()
     # Keep digits and separators /.- and spaces
     cleaned = re.sub(r"[^0-9/.\- ]+", "", text).strip()
@@ -353,19 +478,11 @@ def _normalize_tax_registration(value: object) -> Optional[str]:
 
 
 def _extract_dates_from_text(text: str) -> List[str]:
-    import re
-
-    dates = []
-    for match in re.findall(r"\b\d{2}\.\d{2}\.\d{4}\b", text):
-        iso = parse_date_to_iso(match)
-        if iso:
-            dates.append(iso)
-    return dates
+    # Returned as ISO YYYY-MM-DD strings so callers can order them with max().
+    return [f"{year}-{month}-{day}" for day, month, year in DE_DATE_RE.findall(text)]
 
 
 def _extract_days_from_text(text: str) -> Optional[int]:
-    import re
-
     stripped = text.strip()
     if stripped.isdigit():
         try:
@@ -540,7 +657,7 @@ def phase1_normalize(invoice: CanonicalInvoice) -> List[Patch]:
         if record and isinstance(record.value, str):
             numeric = parse_decimal(record.value)
             if numeric is not None:
-                normalized = f"{numeric:.2f}"
+                normalized = _fmt2(numeric)
                 if normalized != record.value:
                     patches.append(
                         _make_patch(
@@ -561,7 +678,7 @@ def phase1_normalize(invoice: CanonicalInvoice) -> List[Patch]:
             if record and isinstance(record.value, str):
                 numeric = parse_decimal(record.value)
                 if numeric is not None:
-                    normalized = f"{numeric:.2f}"
+                    normalized = _fmt2(numeric)
                     if normalized != record.value:
                         patches.append(
                             _make_patch(
@@ -583,6 +700,8 @@ def phase1_normalize(invoice: CanonicalInvoice) -> List[Patch]:
 # Phase 2: Deterministic derivation
 
 def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
+    # Any BT a rule here reads (helpers included) must be listed in PHASE2_INPUT_BTS;
+    # a missing one means a patch to it no longer triggers the re-run.
     patches: List[Patch] = []
 
     # Line identifiers
@@ -756,8 +875,6 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
     if bt20 and bt20.value and bt81 and bt81.value:
         instant_tokens = {"vorkasse", "credit card", "kreditkarte", "paypal", "ebay", "klarna", "kaufland", "amazon", "online"}
         if any(token in str(bt81.value).lower() for token in instant_tokens):
-            import re
-
             terms_text = str(bt20.value).replace(",", ".")
             percent_match = re.search(r"(\d+(?:\.\d+)?)\s*%\s*skonto", terms_text, re.IGNORECASE)
             amount_match = re.search(r"\(([-\d\.]+)\s*(?:eur|€)?\)", terms_text, re.IGNORECASE)
@@ -768,7 +885,7 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
                     _make_patch(
                         "totals",
                         "BT-94",
-                        f"{skonto_percent:.2f}",
+                        _fmt2(skonto_percent),
                         status="derived",
                         source="derived",
                         derivation="Skonto percentage from payment terms",
@@ -781,7 +898,7 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
                     _make_patch(
                         "totals",
                         "BT-92",
-                        f"{skonto_amount:.2f}",
+                        _fmt2(skonto_amount),
                         status="derived",
                         source="derived",
                         derivation="Skonto amount from payment terms",
@@ -795,7 +912,7 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
                         _make_patch(
                             "totals",
                             "BT-107",
-                            f"{skonto_amount:.2f}",
+                            _fmt2(skonto_amount),
                             status="derived",
                             source="derived",
                             derivation="Sum of document-level allowances",
@@ -825,25 +942,27 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
                 )
             )
 
+    summary = _line_summary(invoice)
+    columns = summary.columns
+
     # Derive BT-131 when missing: BT-146 * BT-129 * (1 - BT-138%)
-    for line in invoice.lines:
+    for idx, line in enumerate(invoice.lines):
         bt131 = line.bt.get("BT-131")
         if not bt131 or bt131.value:
             continue
-        qty = parse_decimal(line.bt.get("BT-129").value) if line.bt.get("BT-129") else None
-        unit_price = parse_decimal(line.bt.get("BT-146").value) if line.bt.get("BT-146") else None
-        discount_pct = parse_decimal(line.bt.get("BT-138").value) if line.bt.get("BT-138") else None
+        qty = columns["BT-129"][idx]
+        unit_price = columns["BT-146"][idx]
+        discount_pct = columns["BT-138"][idx]
         if qty is None or unit_price is None:
             continue
         line_total = unit_price * qty
         if discount_pct is not None:
             line_total = line_total * (1 - (discount_pct / 100))
-        line_total = round(line_total, 2)
         patches.append(
             _make_patch(
                 "line",
                 "BT-131",
-                f"{line_total:.2f}",
+                _fmt2(line_total),
                 line_id=line.line_id,
                 status="derived",
                 source="derived",
@@ -853,27 +972,15 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
         )
 
     # BT-106 sum of line net amounts
-    line_net_values = []
-    for line in invoice.lines:
-        value = parse_decimal(line.bt.get("BT-131").value) if line.bt.get("BT-131") else None
-        if value is None:
-            continue
-        net_value = value
-        # If BT-131 likely pre-discount and line allowance exists, subtract it.
-        has_discount_pct = parse_decimal(line.bt.get("BT-138").value) if line.bt.get("BT-138") else None
-        allowance = parse_decimal(line.bt.get("BT-147").value) if line.bt.get("BT-147") else None
-        if has_discount_pct is None and allowance is not None:
-            net_value = net_value - allowance
-        line_net_values.append(net_value)
-    if line_net_values:
-        total = round(sum(line_net_values), 2)
+    if summary.net_after_allowance_sum is not None:
+        total = summary.net_after_allowance_sum
         bt106 = _bt(invoice.totals, "BT-106")
         if bt106 and not bt106.value:
             patches.append(
                 _make_patch(
                     "totals",
                     "BT-106",
-                    f"{total:.2f}",
+                    _fmt2(total),
                     status="derived",
                     source="derived",
                     derivation="Sum of line net amounts (line allowances applied)",
@@ -885,14 +992,14 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
     bt92 = _bt(invoice.totals, "BT-92")
     bt108 = _bt(invoice.totals, "BT-108")
     bt107 = _bt(invoice.totals, "BT-107")
-    charge_amount = parse_decimal(bt99.value) if bt99 and bt99.value else None
-    allowance_amount = parse_decimal(bt92.value) if bt92 and bt92.value else None
+    charge_amount = invoice.get_total_decimal("BT-99") if bt99 and bt99.value else None
+    allowance_amount = invoice.get_total_decimal("BT-92") if bt92 and bt92.value else None
     if bt108 and not bt108.value and charge_amount is not None:
         patches.append(
             _make_patch(
                 "totals",
                 "BT-108",
-                f"{charge_amount:.2f}",
+                _fmt2(charge_amount),
                 status="derived",
                 source="derived",
                 derivation="Derived from document charge amount",
@@ -904,7 +1011,7 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
             _make_patch(
                 "totals",
                 "BT-107",
-                f"{allowance_amount:.2f}",
+                _fmt2(allowance_amount),
                 status="derived",
                 source="derived",
                 derivation="Derived from document allowance amount",
@@ -913,44 +1020,18 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
         )
 
     # Normalize duplicate currency tokens (e.g., "EUR EUR")
-    bt5 = _bt(invoice.header, "BT-5")
-    if bt5 and bt5.value and isinstance(bt5.value, str):
-        tokens = [t for t in bt5.value.strip().split() if t]
-        if len(tokens) > 1 and tokens[0] == tokens[1]:
-            patches.append(
-                _make_patch(
-                    "header",
-                    "BT-5",
-                    tokens[0],
-                    status="corrected",
-                    source="rule",
-                    derivation="Removed duplicate currency token",
-                    rule_id="R-HDR-CURRENCY-DEDUP-001",
-                    evidence=bt5.evidence,
-                )
-            )
+    patch = _dedup_leading_token(invoice.header, "BT-5", "Removed duplicate currency token", "R-HDR-CURRENCY-DEDUP-001")
+    if patch:
+        patches.append(patch)
 
     # Normalize duplicate dates (e.g., "03.12.2020 03.12.2020")
-    bt72 = _bt(invoice.header, "BT-72")
-    if bt72 and bt72.value and isinstance(bt72.value, str):
-        tokens = [t for t in bt72.value.strip().split() if t]
-        if len(tokens) > 1 and tokens[0] == tokens[1]:
-            patches.append(
-                _make_patch(
-                    "header",
-                    "BT-72",
-                    tokens[0],
-                    status="corrected",
-                    source="rule",
-                    derivation="Removed duplicate date token",
-                    rule_id="R-HDR-DATE-DEDUP-001",
-                    evidence=bt72.evidence,
-                )
-            )
+    patch = _dedup_leading_token(invoice.header, "BT-72", "Removed duplicate date token", "R-HDR-DATE-DEDUP-001")
+    if patch:
+        patches.append(patch)
 
-    bt106_val = parse_decimal(_bt(invoice.totals, "BT-106").value) if _bt(invoice.totals, "BT-106") else None
-    bt107_val = parse_decimal(_bt(invoice.totals, "BT-107").value) if _bt(invoice.totals, "BT-107") else 0.0
-    bt108_val = parse_decimal(_bt(invoice.totals, "BT-108").value) if _bt(invoice.totals, "BT-108") else 0.0
+    bt106_val = invoice.get_total_decimal("BT-106")
+    bt107_val = invoice.get_total_decimal("BT-107") or 0.0
+    bt108_val = invoice.get_total_decimal("BT-108") or 0.0
 
     bt109 = _bt(invoice.totals, "BT-109")
     bt110 = _bt(invoice.totals, "BT-110")
@@ -959,12 +1040,12 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
     bt113 = _bt(invoice.totals, "BT-113")
 
     if bt106_val is not None and bt109 and not bt109.value:
-        total_without_vat = round(bt106_val + (bt108_val or 0.0), 2)
+        total_without_vat = bt106_val + (bt108_val or 0.0)
         patches.append(
             _make_patch(
                 "totals",
                 "BT-109",
-                f"{total_without_vat:.2f}",
+                _fmt2(total_without_vat),
                 status="derived",
                 source="derived",
                 derivation="BT-106 + BT-108",
@@ -972,18 +1053,18 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
             )
         )
 
-    bt109_val = parse_decimal(bt109.value) if bt109 and bt109.value else None
-    bt110_val = parse_decimal(bt110.value) if bt110 and bt110.value else None
-    bt112_val = parse_decimal(bt112.value) if bt112 and bt112.value else None
-    bt113_val = parse_decimal(bt113.value) if bt113 and bt113.value else None
+    bt109_val = invoice.get_total_decimal("BT-109") if bt109 and bt109.value else None
+    bt110_val = invoice.get_total_decimal("BT-110") if bt110 and bt110.value else None
+    bt112_val = invoice.get_total_decimal("BT-112") if bt112 and bt112.value else None
+    bt113_val = invoice.get_total_decimal("BT-113") if bt113 and bt113.value else None
 
     if bt109_val is not None and bt110_val is not None and bt112 and not bt112.value:
-        total_with_vat = round(bt109_val + bt110_val, 2)
+        total_with_vat = bt109_val + bt110_val
         patches.append(
             _make_patch(
                 "totals",
                 "BT-112",
-                f"{total_with_vat:.2f}",
+                _fmt2(total_with_vat),
                 status="derived",
                 source="derived",
                 derivation="BT-109 + BT-110",
@@ -992,12 +1073,12 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
         )
 
     if bt112_val is not None and bt109_val is not None and bt110 and not bt110.value:
-        vat_total = round(bt112_val - bt109_val, 2)
+        vat_total = bt112_val - bt109_val
         patches.append(
             _make_patch(
                 "totals",
                 "BT-110",
-                f"{vat_total:.2f}",
+                _fmt2(vat_total),
                 status="derived",
                 source="derived",
                 derivation="BT-112 - BT-109",
@@ -1007,13 +1088,13 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
 
     if bt112_val is not None and bt113_val is not None and bt115 and not bt115.value:
         if bt112_val >= 0 and bt113_val >= 0 and bt113_val <= bt112_val + TOLERANCE:
-            due = _clean_amount(round(bt112_val - bt113_val - (bt107_val or 0.0), 2))
+            due = _clean_amount(bt112_val - bt113_val - (bt107_val or 0.0))
             if due is not None and due >= 0:
                 patches.append(
                     _make_patch(
                         "totals",
                         "BT-115",
-                        f"{due:.2f}",
+                        _fmt2(due),
                         status="derived",
                         source="derived",
                         derivation="BT-112 - BT-113 - BT-107",
@@ -1022,46 +1103,34 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
                 )
 
     if bt109_val is not None and bt110 and not bt110.value:
-        vat_rate_values = []
-        for line in invoice.lines:
-            rate = parse_decimal(line.bt.get("BT-152").value) if line.bt.get("BT-152") else None
-            if rate is not None:
-                vat_rate_values.append(rate)
-        if vat_rate_values:
-            rate_set = {round(r, 2) for r in vat_rate_values}
-            if len(rate_set) == 1:
-                rate = next(iter(rate_set))
-                vat_total = round(bt109_val * (rate / 100), 2)
-                patches.append(
-                    _make_patch(
-                        "totals",
-                        "BT-110",
-                        f"{vat_total:.2f}",
-                        status="derived",
-                        source="derived",
-                        derivation=f"BT-109 * {rate:.2f}%",
-                        rule_id="R-TOT-VAT-001",
-                    )
+        rate = summary.vat_rate
+        if rate is not None:
+            vat_total = bt109_val * (rate / 100)
+            patches.append(
+                _make_patch(
+                    "totals",
+                    "BT-110",
+                    _fmt2(vat_total),
+                    status="derived",
+                    source="derived",
+                    derivation=f"BT-109 * {rate:.2f}%",
+                    rule_id="R-TOT-VAT-001",
                 )
+            )
 
     bt116 = _bt(invoice.totals, "BT-116")
     taxable = None
     if bt109_val is not None:
         taxable = bt109_val
     elif bt106_val is not None:
-        taxable = round(bt106_val - (bt107_val or 0.0) + (bt108_val or 0.0), 2)
+        taxable = bt106_val - (bt107_val or 0.0) + (bt108_val or 0.0)
     if bt116 and not bt116.value and taxable is not None:
-        categories = {
-            line.bt.get("BT-151").value
-            for line in invoice.lines
-            if line.bt.get("BT-151") and line.bt.get("BT-151").value
-        }
-        if len(categories) <= 1:
+        if summary.single_vat_category:
             patches.append(
                 _make_patch(
                     "totals",
                     "BT-116",
-                    f"{taxable:.2f}",
+                    _fmt2(taxable),
                     status="derived",
                     source="derived",
                     derivation="Taxable amount from total without VAT (single VAT category)",
@@ -1075,33 +1144,31 @@ def phase2_derive(invoice: CanonicalInvoice) -> List[Patch]:
 # Phase 3: Consistency validation & correction
 
 def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
+    # Keep PHASE3_INPUT_BTS in step with the BTs read below (and by _line_summary), or a
+    # patch to a new input is silently skipped instead of re-validating.
     patches: List[Patch] = []
 
-    bt106_val = parse_decimal(_bt(invoice.totals, "BT-106").value) if _bt(invoice.totals, "BT-106") else None
-    bt107_val = parse_decimal(_bt(invoice.totals, "BT-107").value) if _bt(invoice.totals, "BT-107") else 0.0
-    bt108_val = parse_decimal(_bt(invoice.totals, "BT-108").value) if _bt(invoice.totals, "BT-108") else 0.0
-    bt116_val = parse_decimal(_bt(invoice.totals, "BT-116").value) if _bt(invoice.totals, "BT-116") else None
-    bt92_val = parse_decimal(_bt(invoice.totals, "BT-92").value) if _bt(invoice.totals, "BT-92") else None
-    bt99_val = parse_decimal(_bt(invoice.totals, "BT-99").value) if _bt(invoice.totals, "BT-99") else None
+    summary = _line_summary(invoice)
+    bt106_val = invoice.get_total_decimal("BT-106")
+    bt107_val = invoice.get_total_decimal("BT-107") or 0.0
+    bt108_val = invoice.get_total_decimal("BT-108") or 0.0
+    bt116_val = invoice.get_total_decimal("BT-116")
+    bt92_val = invoice.get_total_decimal("BT-92")
+    bt99_val = invoice.get_total_decimal("BT-99")
     bt109 = _bt(invoice.totals, "BT-109")
     bt110 = _bt(invoice.totals, "BT-110")
     bt112 = _bt(invoice.totals, "BT-112")
     bt113 = _bt(invoice.totals, "BT-113")
     bt115 = _bt(invoice.totals, "BT-115")
 
-    bt109_val = parse_decimal(bt109.value) if bt109 and bt109.value else None
-    bt110_val = parse_decimal(bt110.value) if bt110 and bt110.value else None
-    bt112_val = parse_decimal(bt112.value) if bt112 and bt112.value else None
-    bt113_val = parse_decimal(bt113.value) if bt113 and bt113.value else None
+    bt109_val = invoice.get_total_decimal("BT-109") if bt109 and bt109.value else None
+    bt110_val = invoice.get_total_decimal("BT-110") if bt110 and bt110.value else None
+    bt112_val = invoice.get_total_decimal("BT-112") if bt112 and bt112.value else None
+    bt113_val = invoice.get_total_decimal("BT-113") if bt113 and bt113.value else None
 
     # Sum of line net amounts vs BT-106
-    line_net_values = []
-    for line in invoice.lines:
-        value = parse_decimal(line.bt.get("BT-131").value) if line.bt.get("BT-131") else None
-        if value is not None:
-            line_net_values.append(value)
-    if line_net_values:
-        computed = round(sum(line_net_values), 2)
+    if summary.net_sum is not None:
+        computed = round(summary.net_sum, 2)
         if bt106_val is not None and abs(bt106_val - computed) > TOLERANCE:
             bt106 = _bt(invoice.totals, "BT-106")
             if bt106:
@@ -1109,7 +1176,7 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
                     _make_patch(
                         "totals",
                         "BT-106",
-                        f"{computed:.2f}",
+                        _fmt2(computed),
                         status="wrong_math",
                         source="rule",
                         derivation="Sum of line net amounts (BT-131)",
@@ -1128,7 +1195,7 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
                     _make_patch(
                         "totals",
                         "BT-109",
-                        f"{computed:.2f}",
+                        _fmt2(computed),
                         status="wrong_math",
                         source="rule",
                         derivation="BT-106 + BT-108",
@@ -1141,12 +1208,12 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
 
     if bt92_val is not None:
         bt107 = _bt(invoice.totals, "BT-107")
-        if bt107 and bt107.value and abs(parse_decimal(bt107.value) - bt92_val) > TOLERANCE:
+        if bt107 and bt107.value and abs(invoice.get_total_decimal("BT-107") - bt92_val) > TOLERANCE:
             patches.append(
                 _make_patch(
                     "totals",
                     "BT-107",
-                    f"{bt92_val:.2f}",
+                    _fmt2(bt92_val),
                     status="wrong_math",
                     source="rule",
                     derivation="BT-107 should equal BT-92",
@@ -1156,12 +1223,12 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
 
     if bt99_val is not None:
         bt108 = _bt(invoice.totals, "BT-108")
-        if bt108 and bt108.value and abs(parse_decimal(bt108.value) - bt99_val) > TOLERANCE:
+        if bt108 and bt108.value and abs(invoice.get_total_decimal("BT-108") - bt99_val) > TOLERANCE:
             patches.append(
                 _make_patch(
                     "totals",
                     "BT-108",
-                    f"{bt99_val:.2f}",
+                    _fmt2(bt99_val),
                     status="wrong_math",
                     source="rule",
                     derivation="BT-108 should equal BT-99",
@@ -1176,7 +1243,7 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
                 _make_patch(
                     "totals",
                     "BT-112",
-                    f"{computed:.2f}",
+                    _fmt2(computed),
                     status="wrong_math",
                     source="rule",
                     derivation="BT-109 + BT-110",
@@ -1186,12 +1253,12 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
 
     if bt112_val is not None and bt113_val is not None:
         computed = round(bt112_val - bt113_val - (bt107_val or 0.0), 2)
-        if bt115 and bt115.value and abs(parse_decimal(bt115.value) - computed) > TOLERANCE:
+        if bt115 and bt115.value and abs(invoice.get_total_decimal("BT-115") - computed) > TOLERANCE:
             patches.append(
                 _make_patch(
                     "totals",
                     "BT-115",
-                    f"{computed:.2f}",
+                    _fmt2(computed),
                     status="wrong_math",
                     source="rule",
                     derivation="BT-112 - BT-113 - BT-107",
@@ -1201,19 +1268,14 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
 
     # Taxable amount consistency when single VAT category
     if bt116_val is not None and bt109_val is not None:
-        categories = {
-            line.bt.get("BT-151").value
-            for line in invoice.lines
-            if line.bt.get("BT-151") and line.bt.get("BT-151").value
-        }
-        if len(categories) <= 1 and abs(bt116_val - bt109_val) > TOLERANCE:
+        if summary.single_vat_category and abs(bt116_val - bt109_val) > TOLERANCE:
             bt116 = _bt(invoice.totals, "BT-116")
             if bt116:
                 patches.append(
                     _make_patch(
                         "totals",
                         "BT-116",
-                        f"{bt109_val:.2f}",
+                        _fmt2(bt109_val),
                         status="wrong_math",
                         source="rule",
                         derivation="Taxable amount equals total without VAT (single VAT category)",
@@ -1228,9 +1290,13 @@ def phase3_validate(invoice: CanonicalInvoice) -> List[Patch]:
 
 def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
     patches: List[Patch] = []
+    # Local aliases keep the many rule emissions below on fast local lookups.
+    make_patch = _make_patch
+    append_patch = patches.append
+    today = time.gmtime()[:3]
 
-    content = invoice.raw.get("analyzeResult", {}).get("content", "")
-    lines_list = [ln.strip() for ln in content.splitlines() if ln.strip()]
+    content = invoice.raw.get("analyzeResult", {}).get("content") or ""
+    lines_list = [ln.strip() for ln in content.splitlines() if ln.strip()] if content else []
 
     def _find_amount_after(label: str) -> Optional[float]:
         for idx, line in enumerate(lines_list):
@@ -1247,8 +1313,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
     bt5 = _bt(invoice.header, "BT-5")
     if bt5 and not bt5.value:
         if "EUR" in content or "€" in content:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "header",
                     "BT-5",
                     "EUR",
@@ -1265,8 +1331,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
     bt40 = _bt(invoice.header, "BT-40")
     vat = normalize_vat_id(bt31.value) if bt31 and bt31.value else None
     if bt40 and vat and len(vat) >= 2 and bt40.value != vat[:2]:
-        patches.append(
-            _make_patch(
+        append_patch(
+            make_patch(
                 "header",
                 "BT-40",
                 vat[:2],
@@ -1283,11 +1349,11 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
     if bt112 and not bt112.value:
         total_with_vat = _find_amount_after("Gesamtbetrag in EUR") or _find_amount_after("Gesamtbetrag")
         if total_with_vat is not None:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-112",
-                    f"{total_with_vat:.2f}",
+                    _fmt2(total_with_vat),
                     status="corrected",
                     source="rule",
                     derivation="Extracted total with VAT from totals block",
@@ -1297,50 +1363,41 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
             )
 
     # Document-level charges from text (BT-99)
-    import re
-
-    charge_patterns = [
-        re.compile(r"\bversand\b", re.IGNORECASE),
-        re.compile(r"\bversandkosten\b", re.IGNORECASE),
-        re.compile(r"\bporto\b", re.IGNORECASE),
-        re.compile(r"\bdeklarierter wert\b", re.IGNORECASE),
-        re.compile(r"\bshipping\b", re.IGNORECASE),
-        re.compile(r"\bdelivery charge\b", re.IGNORECASE),
-        re.compile(r"\bfreight\b", re.IGNORECASE),
-    ]
     charge_amounts = []
     evidence_snippets = []
     seen_lines = set()
-    for idx, line in enumerate(lines_list):
-        normalized_line = " ".join(line.lower().split())
-        if normalized_line in seen_lines:
-            continue
-        seen_lines.add(normalized_line)
-        if "versandart" in line.lower():
-            continue
-        if "%" in line:
-            continue
-        matched = any(pattern.search(line) for pattern in charge_patterns)
-        if not matched:
-            continue
-        parts = line.split(":")
-        amount_text = parts[-1] if len(parts) > 1 else line
-        amount = parse_decimal(amount_text)
-        if amount is None and idx + 1 < len(lines_list):
-            amount = parse_decimal(lines_list[idx + 1])
+    # A single scan of the full text skips the per-line loop when no charge label is present.
+    if CHARGE_RE.search(content):
+        for idx, line in enumerate(lines_list):
+            normalized_line = " ".join(line.lower().split())
+            if normalized_line in seen_lines:
+                continue
+            seen_lines.add(normalized_line)
+            if "versandart" in line.lower():
+                continue
+            if "%" in line:
+                continue
+            matched = CHARGE_RE.search(line)
+            if not matched:
+                continue
+            parts = line.split(":")
+            amount_text = parts[-1] if len(parts) > 1 else line
+            amount = parse_decimal(amount_text)
+            if amount is None and idx + 1 < len(lines_list):
+                amount = parse_decimal(lines_list[idx + 1])
+                if amount is not None:
+                    evidence_snippets.append(f"{line} {lines_list[idx + 1]}")
             if amount is not None:
-                evidence_snippets.append(f"{line} {lines_list[idx + 1]}")
-        if amount is not None:
-            charge_amounts.append(amount)
-            if line not in evidence_snippets:
-                evidence_snippets.append(line)
+                charge_amounts.append(amount)
+                if line not in evidence_snippets:
+                    evidence_snippets.append(line)
     if charge_amounts:
-        total_charges = round(sum(charge_amounts), 2)
-        patches.append(
-            _make_patch(
+        total_charges = sum(charge_amounts)
+        append_patch(
+            make_patch(
                 "totals",
                 "BT-99",
-                f"{total_charges:.2f}",
+                _fmt2(total_charges),
                 status="corrected",
                 source="rule",
                 derivation="Summed document-level charges from totals section",
@@ -1359,11 +1416,11 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         bt104 = _bt(invoice.totals, "BT-104")
         bt108 = _bt(invoice.totals, "BT-108")
         if bt100 and not bt100.value:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-100",
-                    f"{total_charges:.2f}",
+                    _fmt2(total_charges),
                     status="derived",
                     source="derived",
                     derivation="Charge base set to charge amount",
@@ -1371,8 +1428,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                 )
             )
         if bt102 and not bt102.value:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-102",
                     "S",
@@ -1392,11 +1449,11 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                             vat_rate = parse_decimal(token.strip("%"))
                             break
             if vat_rate is not None:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "totals",
                         "BT-103",
-                        f"{vat_rate:.2f}",
+                        _fmt2(vat_rate),
                         status="derived",
                         source="derived",
                         derivation="Detected VAT rate in totals",
@@ -1404,8 +1461,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                     )
                 )
         if bt104 and not bt104.value and evidence_snippets:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-104",
                     evidence_snippets[0].split(":")[0],
@@ -1416,11 +1473,11 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                 )
             )
         if bt108 and not bt108.value:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-108",
-                    f"{total_charges:.2f}",
+                    _fmt2(total_charges),
                     status="derived",
                     source="derived",
                     derivation="Sum of document-level charges",
@@ -1453,8 +1510,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         instant_payment = True
         if bt81 and not bt81.value:
             if "vorkasse" in content_lower:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "header",
                         "BT-81",
                         "Vorkasse",
@@ -1466,8 +1523,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                     )
                 )
             elif "paypal" in content_lower:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "header",
                         "BT-81",
                         "PayPal",
@@ -1479,8 +1536,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                     )
                 )
             elif "kreditkarte" in content_lower or "credit card" in content_lower:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "header",
                         "BT-81",
                         "Credit card",
@@ -1499,8 +1556,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         if dates:
             latest = max(dates)
             if bt9.value != latest:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "header",
                         "BT-9",
                         latest,
@@ -1516,8 +1573,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
             if days and bt2 and bt2.value:
                 due = _add_days(bt2.value, days)
                 if due and bt9.value != due:
-                    patches.append(
-                        _make_patch(
+                    append_patch(
+                        make_patch(
                             "header",
                             "BT-9",
                             due,
@@ -1534,8 +1591,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         dates = _extract_dates_from_text(terms_text)
         if dates:
             latest = max(dates)
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "header",
                     "BT-9",
                     latest,
@@ -1551,8 +1608,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
             if days and bt2 and bt2.value:
                 due = _add_days(bt2.value, days)
                 if due:
-                    patches.append(
-                        _make_patch(
+                    append_patch(
+                        make_patch(
                             "header",
                             "BT-9",
                             due,
@@ -1567,8 +1624,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
     if instant_payment:
         # Payment due date = invoice date when paid immediately
         if bt9 and not bt9.value and bt2 and bt2.value:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "header",
                     "BT-9",
                     bt2.value,
@@ -1579,7 +1636,7 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                 )
             )
 
-        total_with_vat = parse_decimal(bt112.value) if bt112 and bt112.value else None
+        total_with_vat = invoice.get_total_decimal("BT-112") if bt112 and bt112.value else None
         if total_with_vat is None:
             total_with_vat = _find_amount_after("Gesamtbetrag in EUR") or _find_amount_after("Gesamtbetrag")
 
@@ -1593,8 +1650,6 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         skonto_percent = None
         skonto_amount = None
         if bt20 and bt20.value:
-            import re
-
             terms_text = str(bt20.value).replace(",", ".")
             percent_match = re.search(r"(\\d+(?:\\.\\d+)?)\\s*%\\s*skonto", terms_text, re.IGNORECASE)
             amount_match = re.search(r"\\(([-\\d\\.]+)\\s*(?:eur|€)?\\)", terms_text, re.IGNORECASE)
@@ -1606,8 +1661,6 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
             if "skonto" in line.lower():
                 normalized = line.replace(",", ".")
                 # Match "2% Skonto" or "2 % Skonto"
-                import re
-
                 match = re.search(r"(\\d+(?:\\.\\d+)?)\\s*%\\s*skonto", normalized, re.IGNORECASE)
                 if match:
                     skonto_percent = parse_decimal(match.group(1))
@@ -1626,28 +1679,28 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
 
         if skonto_percent is not None:
             if bt94 and not bt94.value:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "totals",
                         "BT-94",
-                        f"{skonto_percent:.2f}",
+                        _fmt2(skonto_percent),
                         status="derived",
                         source="derived",
                         derivation="Detected Skonto percentage in payment terms",
                         rule_id="R-PAY-SKONTO-001",
                     )
                 )
-        bt92_value = parse_decimal(bt92.value) if bt92 and _has_value(bt92.value) else None
+        bt92_value = invoice.get_total_decimal("BT-92") if bt92 and _has_value(bt92.value) else None
         if bt92 and total_with_vat is not None:
             existing_allowance = bt92_value
             if allowance is None and skonto_percent is not None:
                 allowance = round(total_with_vat * (skonto_percent / 100), 2)
             if allowance is not None and (existing_allowance is None or existing_allowance == 0):
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "totals",
                         "BT-92",
-                        f"{allowance:.2f}",
+                        _fmt2(allowance),
                         status="derived",
                         source="derived",
                         derivation="BT-112 minus amount after Skonto" if amount_after_skonto is not None else f"BT-112 * {skonto_percent:.2f}% Skonto",
@@ -1655,11 +1708,11 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                     )
                 )
         if bt93 and not bt93.value and total_with_vat is not None and bt92_value is not None:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-93",
-                    f"{total_with_vat:.2f}",
+                    _fmt2(total_with_vat),
                     status="derived",
                     source="derived",
                     derivation="Allowance base = total with VAT",
@@ -1667,8 +1720,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                 )
             )
         if bt97 and not bt97.value and bt92_value is not None:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-97",
                     "Skonto",
@@ -1679,8 +1732,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                 )
             )
         if bt98 and not bt98.value and bt92_value is not None:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-98",
                     "SKONTO",
@@ -1693,8 +1746,8 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
 
         # Ensure sum of allowances (BT-107)
         if bt107 and not bt107.value and bt92_value is not None:
-            patches.append(
-                _make_patch(
+            append_patch(
+                make_patch(
                     "totals",
                     "BT-107",
                     bt92.value,
@@ -1708,20 +1761,20 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         # Paid amount equals total with VAT minus allowance (if any), or explicit amount after Skonto
         if bt113 and (not bt113.value or bt113.status in {"derived", "wrong_math"}) and total_with_vat is not None:
             if amount_after_skonto is not None:
-                paid = _clean_amount(round(amount_after_skonto, 2))
+                paid = _clean_amount(amount_after_skonto)
                 derivation = "Extracted amount after Skonto from totals block"
                 rule_id = "R-HDR-PAID-004"
             else:
-                allowance_val = parse_decimal(bt107.value) if bt107 and _has_value(bt107.value) else 0.0
-                paid = _clean_amount(round(total_with_vat - allowance_val, 2))
+                allowance_val = invoice.get_total_decimal("BT-107") if bt107 and _has_value(bt107.value) else 0.0
+                paid = _clean_amount(total_with_vat - allowance_val)
                 derivation = "Instant payment: BT-112 - BT-107"
                 rule_id = "R-HDR-PAID-002"
             if paid is not None and paid >= 0:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "totals",
                         "BT-113",
-                        f"{paid:.2f}",
+                        _fmt2(paid),
                         status="derived",
                         source="derived",
                         derivation=derivation,
@@ -1729,17 +1782,17 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                     )
                 )
         if bt115 and (not bt115.value or bt115.status in {"derived", "wrong_math"}) and total_with_vat is not None:
-            allowance_val = parse_decimal(bt107.value) if bt107 and _has_value(bt107.value) else 0.0
+            allowance_val = invoice.get_total_decimal("BT-107") if bt107 and _has_value(bt107.value) else 0.0
             if bt113 and _has_value(bt113.value):
-                computed_due = _clean_amount(round(total_with_vat - parse_decimal(bt113.value) - allowance_val, 2))
+                computed_due = _clean_amount(total_with_vat - invoice.get_total_decimal("BT-113") - allowance_val)
             else:
                 computed_due = 0.0
             if computed_due is not None and computed_due >= 0:
-                patches.append(
-                    _make_patch(
+                append_patch(
+                    make_patch(
                         "totals",
                         "BT-115",
-                        f"{computed_due:.2f}",
+                        _fmt2(computed_due),
                         status="derived",
                         source="derived",
                         derivation="BT-112 - BT-113 - BT-107",
@@ -1749,16 +1802,20 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
 
     # If due date is in the future and no paid amount, amount due equals total with VAT
     if bt115 and not bt115.value and bt113 and not bt113.value and bt112 and bt112.value and bt9 and bt9.value:
-        today = datetime.utcnow().date()
         due_iso = parse_date_to_iso(bt9.value)
         if due_iso:
-            try:
-                due_date = datetime.strptime(due_iso, "%Y-%m-%d").date()
-            except ValueError:
-                due_date = None
-            if due_date and due_date > today:
-                patches.append(
-                    _make_patch(
+            # parse_date_to_iso guarantees YYYY-MM-DD; compare (y, m, d) against UTC today and
+            # only build a date (to reject e.g. 31.02.) once the due date is in the future.
+            due_key = (int(due_iso[:4]), int(due_iso[5:7]), int(due_iso[8:10]))
+            due_date = None
+            if due_key > today:
+                try:
+                    due_date = date(*due_key)
+                except ValueError:
+                    due_date = None
+            if due_date:
+                append_patch(
+                    make_patch(
                         "totals",
                         "BT-115",
                         bt112.value,
@@ -1771,19 +1828,12 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
                 )
 
     # Net/gross ambiguity resolution (line amounts)
-    total_without_vat = parse_decimal(_bt(invoice.totals, "BT-109").value) if _bt(invoice.totals, "BT-109") else None
-    doc_allowances = parse_decimal(_bt(invoice.totals, "BT-107").value) if _bt(invoice.totals, "BT-107") else 0.0
-    doc_charges = parse_decimal(_bt(invoice.totals, "BT-108").value) if _bt(invoice.totals, "BT-108") else 0.0
-    line_amounts = []
-    line_allowances = 0.0
-    for line in invoice.lines:
-        amount = parse_decimal(line.bt.get("BT-131").value) if line.bt.get("BT-131") else None
-        if amount is not None:
-            line_amounts.append(amount)
-        allowance = parse_decimal(line.bt.get("BT-147").value) if line.bt.get("BT-147") else None
-        if allowance is not None:
-            line_allowances += allowance
-    sum_line_amounts = sum(line_amounts) if line_amounts else None
+    total_without_vat = invoice.get_total_decimal("BT-109")
+    doc_allowances = invoice.get_total_decimal("BT-107") or 0.0
+    doc_charges = invoice.get_total_decimal("BT-108") or 0.0
+    summary = _line_summary(invoice)
+    line_allowances = summary.allowance_sum
+    sum_line_amounts = summary.net_sum
     treat_gross = False
     if (doc_allowances or doc_charges or line_allowances):
         treat_gross = False
@@ -1792,74 +1842,84 @@ def phase4_resolve(invoice: CanonicalInvoice) -> List[Patch]:
         if sum_line_amounts > expected_sum * 1.001:
             treat_gross = True
 
-    for line in invoice.lines:
-        bts = line.bt
-        qty = parse_decimal(bts.get("BT-129").value) if bts.get("BT-129") else None
-        vat_rate = parse_decimal(bts.get("BT-152").value) if bts.get("BT-152") else None
-        unit_price = parse_decimal(bts.get("BT-146").value) if bts.get("BT-146") else None
-        line_amount = parse_decimal(bts.get("BT-131").value) if bts.get("BT-131") else None
-
-        if treat_gross and vat_rate and vat_rate > 0 and line_amount is not None:
-            factor = 1 + (vat_rate / 100)
-            net_amount = round(line_amount / factor, 2)
-            patches.append(
-                _make_patch(
-                    "line",
-                    "BT-131",
-                    f"{net_amount:.2f}",
-                    line_id=line.line_id,
-                    status="corrected",
-                    source="rule",
-                    derivation=f"{line_amount} / (1+{vat_rate}%)",
-                    rule_id="R-LINE-NETGROSS-001",
-                )
-            )
-            if unit_price is not None:
-                net_unit = round(unit_price / factor, 2)
-                patches.append(
-                    _make_patch(
+    columns = summary.columns
+    qty_col = columns["BT-129"]
+    net_col = columns["BT-131"]
+    price_col = columns["BT-146"]
+    rate_col = columns["BT-152"]
+    for idx, line in enumerate(invoice.lines):
+        line_id = line.line_id
+        if treat_gross:
+            vat_rate = rate_col[idx]
+            line_amount = net_col[idx]
+            if vat_rate and vat_rate > 0 and line_amount is not None:
+                unit_price = price_col[idx]
+                factor = 1 + (vat_rate / 100)
+                net_amount = line_amount / factor
+                append_patch(
+                    make_patch(
                         "line",
-                        "BT-146",
-                        f"{net_unit:.2f}",
-                        line_id=line.line_id,
+                        "BT-131",
+                        _fmt2(net_amount),
+                        line_id=line_id,
                         status="corrected",
                         source="rule",
-                        derivation=f"{unit_price} / (1+{vat_rate}%)",
+                        derivation=f"{line_amount} / (1+{vat_rate}%)",
                         rule_id="R-LINE-NETGROSS-001",
                     )
                 )
-                patches.append(
-                    _make_patch(
+                if unit_price is not None:
+                    net_unit = unit_price / factor
+                    patches.extend(
+                        (
+                            make_patch(
+                                "line",
+                                "BT-146",
+                                _fmt2(net_unit),
+                                line_id=line_id,
+                                status="corrected",
+                                source="rule",
+                                derivation=f"{unit_price} / (1+{vat_rate}%)",
+                                rule_id="R-LINE-NETGROSS-001",
+                            ),
+                            make_patch(
+                                "line",
+                                "BT-148",
+                                _fmt2(unit_price),
+                                line_id=line_id,
+                                status="corrected",
+                                source="rule",
+                                derivation="Set gross price from extracted unit price",
+                                rule_id="R-LINE-NETGROSS-001",
+                            ),
+                        )
+                    )
+
+        # Default UOM if missing and quantity exists
+        bt130 = line.bt.get("BT-130")
+        if bt130 and not bt130.value:
+            qty = qty_col[idx]
+            if qty is not None:
+                append_patch(
+                    make_patch(
                         "line",
-                        "BT-148",
-                        f"{unit_price:.2f}",
-                        line_id=line.line_id,
+                        "BT-130",
+                        "C62",
+                        line_id=line_id,
                         status="corrected",
                         source="rule",
-                        derivation="Set gross price from extracted unit price",
-                        rule_id="R-LINE-NETGROSS-001",
+                        derivation="Defaulted unit to pieces",
+                        rule_id="R-LINE-UOM-001",
                     )
                 )
 
-        # Default UOM if missing and quantity exists
-        bt130 = bts.get("BT-130")
-        if bt130 and not bt130.value and qty is not None:
-            patches.append(
-                _make_patch(
-                    "line",
-                    "BT-130",
-                    "C62",
-                    line_id=line.line_id,
-                    status="corrected",
-                    source="rule",
-                    derivation="Defaulted unit to pieces",
-                    rule_id="R-LINE-UOM-001",
-                )
-            )
-
     return patches
 
 
+def inputs_patched_since(invoice: CanonicalInvoice, mark: int, inputs: frozenset) -> bool:
+    return any(entry["bt"] in inputs for entry in invoice.patches[mark:])
+
+
 def run_all_phases(invoice: CanonicalInvoice) -> List[Patch]:
     patches: List[Patch] = []
     patches.extend(phase1_normalize(invoice))
@@ -0,0 +1,40 @@
+"""File writing helpers."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+# fdatasync skips the metadata flush; macOS only has fsync.
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def write_bytes_atomic(path: Path, payload: bytes, durable: bool = False) -> None:
+    # Readers see either the old file or the complete new one, never a partial write, and
+    # the swap gives the path a new inode. Each writer gets its own temp file, so concurrent
+    # writes cannot clobber each other's.
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        try:
+            # mkstemp creates the file 0600; keep the target's mode, or 0644 for a new file.
+            try:
+                mode = os.stat(path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.fchmod(fd, mode)
+            # Handed to the fd directly, without a buffered file object in between.
+            data = memoryview(payload)
+            while data:
+                data = data[os.write(fd, data):]
+            if durable:
+                _fdatasync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
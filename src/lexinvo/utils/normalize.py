@@ -4,10 +4,18 @@ from __future__ import annotations
 
 import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 
 DECIMAL_RE = re.compile(r"[^0-9,\.-]+")
+DECIMAL_CHARS = "0123456789,.-"
+
+COUNTRY_MAP = {
+    "deutschland": "DE",
+    "germany": "DE",
+    "de": "DE",
+}
 
 
 def parse_decimal(value: object) -> Optional[float]:
@@ -15,22 +23,30 @@ def parse_decimal(value: object) -> Optional[float]:
         return None
     if isinstance(value, (int, float)):
         return float(value)
-    text = str(value).strip()
+    return _parse_decimal_text(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_decimal_text(text: str) -> Optional[float]:
+    # Amounts and rates repeat across totals and lines, so results are cached per text.
+    text = text.strip()
     if not text:
         return None
-    text = DECIMAL_RE.sub("", text)
-    if "," in text and "." in text:
-        # Decide decimal separator by last occurrence.
-        last_comma = text.rfind(",")
+    # Stripping the allowed characters leaves nothing when the text is already clean,
+    # which lets normalized amounts skip the regex pass.
+    if text.strip(DECIMAL_CHARS):
+        text = DECIMAL_RE.sub("", text)
+    last_comma = text.rfind(",")
+    if last_comma != -1:
         last_dot = text.rfind(".")
-        if last_comma > last_dot:
+        if last_dot == -1:
+            text = text.replace(",", ".")
+        elif last_comma > last_dot:
             # European format: 1.234,56 -> 1234.56
             text = text.replace(".", "").replace(",", ".")
         else:
             # US format: 1,234.56 -> 1234.56
             text = text.replace(",", "")
-    elif "," in text:
-        text = text.replace(",", ".")
     try:
         return float(text)
     except ValueError:
@@ -42,18 +58,26 @@ def parse_date_to_iso(value: object) -> Optional[str]:
         return None
     if isinstance(value, datetime):
         return value.strftime("%Y-%m-%d")
-    text = str(value).strip()
+    return _parse_date_text(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(text: str) -> Optional[str]:
+    text = text.strip()
     if not text:
         return None
-    # dd.mm.yyyy
-    m = re.match(r"^(\d{2})\.(\d{2})\.(\d{4})$", text)
-    if m:
-        day, month, year = m.groups()
-        return f"{year}-{month}-{day}"
+    # Both accepted formats are exactly 10 characters; check separators and digits by position.
+    if len(text) != 10:
+        return None
     # yyyy-mm-dd
-    m = re.match(r"^(\d{4})-(\d{2})-(\d{2})$", text)
-    if m:
-        return text
+    if text[4] == "-" and text[7] == "-":
+        if text[:4].isdecimal() and text[5:7].isdecimal() and text[8:].isdecimal():
+            return text
+        return None
+    # dd.mm.yyyy
+    if text[2] == "." and text[5] == ".":
+        if text[:2].isdecimal() and text[3:5].isdecimal() and text[6:].isdecimal():
+            return f"{text[6:]}-{text[3:5]}-{text[:2]}"
     return None
 
 
@@ -63,14 +87,11 @@ def normalize_country(value: object) -> Optional[str]:
     text = str(value).strip()
     if not text:
         return None
-    mapping = {
-        "deutschland": "DE",
-        "germany": "DE",
-        "de": "DE",
-    }
-    key = text.lower()
-    if key in mapping:
-        return mapping[key]
+    if len(text) == 2 and text.isascii() and text.isalpha():
+        return text.upper()
+    country = COUNTRY_MAP.get(text.lower())
+    if country is not None:
+        return country
     if len(text) == 2 and text.isalpha():
         return text.upper()
     return None
@@ -82,7 +103,7 @@ def normalize_vat_id(value: object) -> Optional[str]:
     text = str(value).strip().upper()
     if not text:
         return None
-    return re.sub(r"\s+", "", text)
+    return "".join(text.split())
 
 
 def normalize_email(value: object) -> Optional[str]:
@@ -4,14 +4,27 @@ from __future__ import annotations
 
 import json
 import os
+import threading
+from collections import defaultdict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-from flask import Flask, redirect, render_template, request, send_file, url_for
+import orjson
+from flask import Flask, Response, redirect, render_template, request, send_file, url_for
 
 from lexinvo.core.pipeline import run_pipeline
+from lexinvo.utils.fileio import write_bytes_atomic
 
 app = Flask(__name__)
+# Set before the routes below are registered: rules match with or without a trailing slash,
+# so there are no slash redirects (or 404s for "/success/").
+app.url_map.strict_slashes = False
+# Behind Apache/lighttpd, let the server stream downloads itself (X-Sendfile header).
+app.config["USE_X_SENDFILE"] = os.getenv("LEXINVO_X_SENDFILE", "").lower() in {"1", "true", "yes"}
+# Behind nginx, internal location that maps onto OUTPUT_DIR; downloads go out via X-Accel-Redirect.
+XACCEL_PREFIX = os.getenv("LEXINVO_XACCEL_PREFIX", "").rstrip("/")
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 INPUT_PATH = PROJECT_ROOT / "input" / "azure_invoice.json"
@@ -35,6 +48,8 @@ OUTPUT_FILES = {
     "en16931_basic": "en16931_basic.json",
     "bt_store": "bt_store.json",
 }
+# Outputs /success renders; bt_store.json only mirrors the canonical invoice.
+SUCCESS_OUTPUTS = ("canonical_invoice", "corrections_report")
 
 RELEVANT_BTS = [
     "BT-3",
@@ -76,83 +91,167 @@ RELEVANT_BTS = [
     "BT-115",
     "BT-116",
 ]
-
-
-def _read_json(path: Path) -> Dict[str, Any]:
-    if not path.exists():
+RELEVANT_BT_ORDER = {bt: idx for idx, bt in enumerate(RELEVANT_BTS)}
+
+
+# (output field, BT) pairs per section of the EN16931 basic summary.
+EN16931_PROFILE_FIELDS = (("specification_identifier", "BT-24"), ("invoice_type_code", "BT-3"))
+EN16931_HEADER_FIELDS = (
+    ("invoice_number", "BT-1"),
+    ("issue_date", "BT-2"),
+    ("currency", "BT-5"),
+    ("note_subject_code", "BT-21"),
+    ("payment_terms", "BT-20"),
+)
+EN16931_SELLER_FIELDS = (("name", "BT-27"), ("vat_id", "BT-31"))
+EN16931_BUYER_FIELDS = (("name", "BT-44"),)
+EN16931_TOTALS_FIELDS = (
+    ("sum_line_net", "BT-106"),
+    ("total_without_vat", "BT-109"),
+    ("vat_total", "BT-110"),
+    ("total_with_vat", "BT-112"),
+    ("amount_due", "BT-115"),
+)
+
+# Shared stand-in for a missing record or mapping; read-only so no caller can leak state into it.
+EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# One table row of the review page; templates read the fields as attributes.
+Row = namedtuple("Row", "bt name line_id old new status")
+
+
+# Parsed JSON per path, keyed on (inode, mtime_ns, size) so rewritten files are picked up. Output
+# files are only ever swapped in with os.replace(), so the inode catches a rewrite within one mtime tick.
+_JSON_CACHE: Dict[Path, Tuple[Tuple[int, int, int], Any]] = {}
+_READ_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
+def _slurp(path: Path) -> bytes:
+    # Whole-file read sized from fstat, without a buffered file object in between.
+    # Only an empty read means EOF; a short one may just be a partial read.
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        chunk_size = os.fstat(fd).st_size + 1
+        while True:
+            chunk = os.read(fd, chunk_size)
+            if not chunk:
+                return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+            chunks.append(chunk)
+            chunk_size = 1 << 20
+    finally:
+        os.close(fd)
+
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    try:
+        raw = _slurp(path)
+    except FileNotFoundError:
         return {}
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return orjson.loads(raw)
     except json.JSONDecodeError:
         return {"error": "Invalid JSON output", "path": str(path)}
 
 
-def _read_registry() -> Dict[str, Any]:
-    return _read_json(CONFIG_DIR / "bt_registry.json")
+def _json_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    # The returned object is shared between requests; callers must not mutate it.
+    return _read_json_keyed(path, _json_key(path))
+
+
+def _read_json_keyed(path: Path, key: Optional[Tuple[int, int, int]]) -> Dict[str, Any]:
+    if key is None:
+        _JSON_CACHE.pop(path, None)
+        return {}
+    cached = _JSON_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    data = _load_json(path)
+    _JSON_CACHE[path] = (key, data)
+    return data
+
+
+def _read_json_files(paths: List[Path]) -> List[Dict[str, Any]]:
+    keys = [_json_key(path) for path in paths]
+    stale = sum(1 for path, key in zip(paths, keys) if key is not None and _JSON_CACHE.get(path, (None,))[0] != key)
+    if stale > 1:
+        # Several files changed (typically right after a run): overlap their reads and parses.
+        return list(_READ_EXECUTOR.map(_read_json_keyed, paths, keys))
+    return [_read_json_keyed(path, key) for path, key in zip(paths, keys)]
+
+
+def _write_json(path: Path, payload: Any, durable: bool = False) -> None:
+    write_bytes_atomic(path, orjson.dumps(payload, option=orjson.OPT_INDENT_2), durable)
+
+
+# Loaded once at import and frozen; the registry is deployment config, so edits need a restart.
+_REGISTRY: Mapping[str, Any] = MappingProxyType(_load_json(CONFIG_DIR / "bt_registry.json"))
+
+
+def _read_registry() -> Mapping[str, Any]:
+    return _REGISTRY
+
+
+# (registry, header BTs, line BTs, names), keyed on the registry object; with the frozen
+# _REGISTRY it is computed once per process.
+_REGISTRY_LAYOUT: Tuple[Any, Tuple[str, ...], Tuple[str, ...], Dict[str, str]] = (None, (), (), {})
+
+
+def _registry_layout(registry: Mapping[str, Any]) -> Tuple[Tuple[str, ...], Tuple[str, ...], Dict[str, str]]:
+    global _REGISTRY_LAYOUT
+    if _REGISTRY_LAYOUT[0] is not registry:
+        ordered = sorted(registry.keys(), key=_bt_sort_key)
+        header_bts = tuple(bt for bt in ordered if registry[bt].get("group", "header") != "line")
+        line_bts = tuple(bt for bt in ordered if registry[bt].get("group") == "line")
+        names = {bt: registry[bt].get("name", "") for bt in ordered}
+        _REGISTRY_LAYOUT = (registry, header_bts, line_bts, names)
+    return _REGISTRY_LAYOUT[1], _REGISTRY_LAYOUT[2], _REGISTRY_LAYOUT[3]
 
 
 def _bt_sort_key(bt: str) -> int:
-    try:
-        return int(bt.replace("BT-", ""))
-    except ValueError:
-        return 9999
+    number = bt[3:]
+    if bt[:3] == "BT-" and number.isdecimal():
+        return int(number)
+    return 9999
 
 
-def _build_corrections(corrections_report: Dict[str, Any]) -> List[Dict[str, Any]]:
-    entries = corrections_report.get("entries", [])
-    rows = []
-    for entry in entries:
-        rows.append(
-            {
-                "bt": entry.get("bt"),
-                "name": "",
-                "old": entry.get("old_value"),
-                "new": entry.get("new_value"),
-                "status": entry.get("status"),
-                "line_id": entry.get("line_id"),
-            }
-        )
-    return rows
+def _build_corrections(corrections_report: Dict[str, Any]) -> List[Row]:
+    return [
+        Row(entry.get("bt"), "", entry.get("line_id"), entry.get("old_value"), entry.get("new_value"), entry.get("status"))
+        for entry in corrections_report.get("entries", [])
+    ]
 
 
 def _feedback_key(bt: str, line_id: Any) -> str:
     return f"{bt}:{line_id if line_id is not None else 'header'}"
 
 
+def _field_values(scope: Dict[str, Any], fields: Tuple[Tuple[str, str], ...]) -> Dict[str, Any]:
+    return {name: (scope.get(bt) or EMPTY).get("value") for name, bt in fields}
+
+
 def _build_en16931_basic_from_canonical(canonical: Dict[str, Any]) -> Dict[str, Any]:
-    header = canonical.get("header", {})
-    totals = canonical.get("totals", {})
-    lines = canonical.get("lines", [])
+    header = canonical.get("header", EMPTY)
+    totals = canonical.get("totals", EMPTY)
+    lines = canonical.get("lines", ())
     return {
-        "profile": {
-            "specification_identifier": header.get("BT-24", {}).get("value"),
-            "invoice_type_code": header.get("BT-3", {}).get("value"),
-        },
-        "header": {
-            "invoice_number": header.get("BT-1", {}).get("value"),
-            "issue_date": header.get("BT-2", {}).get("value"),
-            "currency": header.get("BT-5", {}).get("value"),
-            "note_subject_code": header.get("BT-21", {}).get("value"),
-            "payment_terms": header.get("BT-20", {}).get("value"),
-        },
-        "seller": {
-            "name": header.get("BT-27", {}).get("value"),
-            "vat_id": header.get("BT-31", {}).get("value"),
-        },
-        "buyer": {
-            "name": header.get("BT-44", {}).get("value"),
-        },
+        "profile": _field_values(header, EN16931_PROFILE_FIELDS),
+        "header": _field_values(header, EN16931_HEADER_FIELDS),
+        "seller": _field_values(header, EN16931_SELLER_FIELDS),
+        "buyer": _field_values(header, EN16931_BUYER_FIELDS),
         "lines": [
-            {bt: val.get("value") for bt, val in (line.get("bt", {}) or {}).items()}
+            {bt: val.get("value") for bt, val in (line.get("bt") or EMPTY).items()}
             for line in lines
         ],
-        "totals": {
-            "sum_line_net": totals.get("BT-106", {}).get("value"),
-            "total_without_vat": totals.get("BT-109", {}).get("value"),
-            "vat_total": totals.get("BT-110", {}).get("value"),
-            "total_with_vat": totals.get("BT-112", {}).get("value"),
-            "amount_due": totals.get("BT-115", {}).get("value"),
-        },
+        "totals": _field_values(totals, EN16931_TOTALS_FIELDS),
     }
 
 
@@ -163,9 +262,15 @@ def _apply_feedback_to_outputs() -> None:
     canonical_path = OUTPUT_DIR / OUTPUT_FILES["canonical_invoice"]
     if not canonical_path.exists():
         return
-    canonical = _read_json(canonical_path)
+    # Loaded uncached because the records are edited in place below.
+    canonical = _load_json(canonical_path)
     if not canonical:
         return
+    changed = False
+    # First line per id, matching the linear scan this replaces.
+    line_index: Dict[str, Dict[str, Any]] = {}
+    for line in canonical.get("lines", ()):
+        line_index.setdefault(str(line.get("line_id")), line)
     for key, entry in feedbacks.items():
         if entry.get("status") != "incorrect":
             continue
@@ -177,127 +282,162 @@ def _apply_feedback_to_outputs() -> None:
         except ValueError:
             continue
         if line_id == "header":
-            record = canonical.get("header", {}).get(bt)
+            record = canonical.get("header", EMPTY).get(bt)
         else:
-            record = None
-            for line in canonical.get("lines", []):
-                if str(line.get("line_id")) == line_id:
-                    record = (line.get("bt", {}) or {}).get(bt)
-                    break
+            line = line_index.get(line_id)
+            record = (line.get("bt") or EMPTY).get(bt) if line is not None else None
         if not record:
             continue
+        if record.get("value") == correct_value and record.get("status") == "corrected" and record.get("source") == "user":
+            continue
         record["value"] = correct_value
         record["status"] = "corrected"
         record["source"] = "user"
-    (OUTPUT_DIR / OUTPUT_FILES["canonical_invoice"]).write_text(
-        json.dumps(canonical, indent=2, ensure_ascii=True), encoding="utf-8"
-    )
-    (OUTPUT_DIR / OUTPUT_FILES["bt_store"]).write_text(
-        json.dumps(canonical, indent=2, ensure_ascii=True), encoding="utf-8"
-    )
+        changed = True
+    if not changed:
+        return
+    # bt_store.json mirrors the canonical invoice; serialize once for both.
+    payload = orjson.dumps(canonical, option=orjson.OPT_INDENT_2)
+    write_bytes_atomic(canonical_path, payload)
+    write_bytes_atomic(OUTPUT_DIR / OUTPUT_FILES["bt_store"], payload)
     en16931_basic = _build_en16931_basic_from_canonical(canonical)
-    (OUTPUT_DIR / OUTPUT_FILES["en16931_basic"]).write_text(
-        json.dumps(en16931_basic, indent=2, ensure_ascii=True), encoding="utf-8"
-    )
+    _write_json(OUTPUT_DIR / OUTPUT_FILES["en16931_basic"], en16931_basic)
 
 
 def _has_value(record: Dict[str, Any]) -> bool:
     return record.get("raw_value") is not None or record.get("value") is not None
 
 
-def _build_relevant(canonical: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _build_relevant(canonical: Dict[str, Any]) -> List[Row]:
     rows = []
+    # Keys are (position in RELEVANT_BTS, line_id): small ints instead of BT strings.
     seen = set()
-    header = canonical.get("header", {})
-    totals = canonical.get("totals", {})
-    for bt in RELEVANT_BTS:
-        record = header.get(bt) or totals.get(bt)
+    header_get = canonical.get("header", EMPTY).get
+    totals_get = canonical.get("totals", EMPTY).get
+    for order, bt in enumerate(RELEVANT_BTS):
+        record = header_get(bt) or totals_get(bt)
         if record:
-            key = (bt, None)
+            key = (order, None)
             if key in seen:
                 continue
             seen.add(key)
             rows.append(
-                {
-                    "bt": bt,
-                    "name": record.get("bt", ""),
-                    "old": record.get("raw_value"),
-                    "new": record.get("value"),
-                    "status": record.get("status"),
-                    "line_id": None,
-                }
+                Row(bt, record.get("bt", ""), None, record.get("raw_value"), record.get("value"), record.get("status"))
             )
 
-    for line in canonical.get("lines", []):
+    order_get = RELEVANT_BT_ORDER.get
+    for line in canonical.get("lines", ()):
         line_id = line.get("line_id")
-        bts = line.get("bt", {})
-        for bt in RELEVANT_BTS:
-            record = bts.get(bt)
-            if not record or not _has_value(record):
+        bts = line.get("bt") or EMPTY
+        # Walk the line's own BTs once and restore RELEVANT_BTS order afterwards.
+        line_rows = []
+        for bt, record in bts.items():
+            order = order_get(bt)
+            if order is None or not record or not _has_value(record):
                 continue
-            key = (bt, line_id)
+            key = (order, line_id)
             if key in seen:
                 continue
             seen.add(key)
-            rows.append(
-                {
-                    "bt": bt,
-                    "name": record.get("bt", ""),
-                    "old": record.get("raw_value"),
-                    "new": record.get("value"),
-                    "status": record.get("status"),
-                    "line_id": line_id,
-                }
+            line_rows.append(
+                (
+                    order,
+                    Row(bt, record.get("bt", ""), line_id, record.get("raw_value"), record.get("value"), record.get("status")),
+                )
             )
+        line_rows.sort(key=lambda item: item[0])
+        rows.extend(row for _, row in line_rows)
     return rows
 
 
-def _build_all_rows(canonical: Dict[str, Any], registry: Dict[str, Any]) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    header = canonical.get("header", {})
-    totals = canonical.get("totals", {})
-    lines = canonical.get("lines", [])
+def _build_all_rows(canonical: Dict[str, Any], registry: Mapping[str, Any]) -> List[Row]:
+    header = canonical.get("header", EMPTY)
+    totals = canonical.get("totals", EMPTY)
+    lines = canonical.get("lines", ())
+    header_bts, line_bts, names = _registry_layout(registry)
+    rows: List[Row] = [None] * (len(header_bts) + len(lines) * len(line_bts))
+    idx = 0
+    header_get = header.get
+    totals_get = totals.get
 
-    for bt in sorted(registry.keys(), key=_bt_sort_key):
-        group = registry.get(bt, {}).get("group", "header")
-        if group == "line":
-            continue
-        record = header.get(bt) or totals.get(bt) or {}
-        rows.append(
-            {
-                "bt": bt,
-                "name": registry.get(bt, {}).get("name", ""),
-                "line_id": "-",
-                "old": record.get("raw_value"),
-                "new": record.get("value"),
-                "status": record.get("status"),
-            }
-        )
+    for bt in header_bts:
+        record = header_get(bt) or totals_get(bt) or EMPTY
+        rows[idx] = Row(bt, names[bt], "-", record.get("raw_value"), record.get("value"), record.get("status"))
+        idx += 1
 
-    line_bts = [bt for bt, spec in registry.items() if spec.get("group") == "line"]
-    line_bts_sorted = sorted(line_bts, key=_bt_sort_key)
     for line in lines:
         line_id = line.get("line_id")
-        bts = line.get("bt", {})
-        for bt in line_bts_sorted:
-            record = bts.get(bt, {})
-            rows.append(
-                {
-                    "bt": bt,
-                    "name": registry.get(bt, {}).get("name", ""),
-                    "line_id": line_id,
-                    "old": record.get("raw_value"),
-                    "new": record.get("value"),
-                    "status": record.get("status"),
-                }
-            )
+        bts_get = (line.get("bt") or EMPTY).get
+        for bt in line_bts:
+            record = bts_get(bt, EMPTY)
+            rows[idx] = Row(bt, names[bt], line_id, record.get("raw_value"), record.get("value"), record.get("status"))
+            idx += 1
 
     return rows
 
 
+# Pipeline runs happen off the request thread, one at a time; /status reports on the latest.
+_PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+_JOB_LOCK = threading.Lock()
+_JOB: Dict[str, Any] = {"status": "idle", "error": None}
+
+
+def _busy_response(notice: str):
+    # 409 rather than a redirect, so a request refused while a run is active is never silently dropped.
+    with _JOB_LOCK:
+        job = dict(_JOB)
+    return render_template("status.html", job=job, notice=notice), 409
+
+
+def _claim_job() -> bool:
+    with _JOB_LOCK:
+        if _JOB["status"] == "running":
+            return False
+        _JOB["status"] = "running"
+        _JOB["error"] = None
+        return True
+
+
+def _finish_job(error: BaseException | None) -> None:
+    with _JOB_LOCK:
+        _JOB["status"] = "error" if error else "done"
+        _JOB["error"] = f"{type(error).__name__}: {error}" if error else None
+
+
+def _job_done(future: Future) -> None:
+    error = future.exception()
+    if error:
+        app.logger.error("Pipeline run failed", exc_info=error)
+    _finish_job(error)
+
+
+def _submit_pipeline(json_path: str | None, pdf_path: str | None) -> Future:
+    return _PIPELINE_EXECUTOR.submit(
+        run_pipeline,
+        input_path=json_path,
+        output_dir=str(OUTPUT_DIR),
+        config_dir=str(CONFIG_DIR),
+        data_dir=str(DATA_DIR),
+        pdf_path=pdf_path,
+    )
+
+
+# Model preselected on the upload form. /run keeps it in sync with LEXINVO_GPT_MODEL,
+# which the pipeline reads, so the landing page does not consult os.environ.
+_DEFAULT_MODEL = os.getenv("LEXINVO_GPT_MODEL", "gpt-4o-mini")
+_MODEL_LOCK = threading.Lock()
+
+
+def _set_default_model(model: str) -> None:
+    global _DEFAULT_MODEL
+    with _MODEL_LOCK:
+        _DEFAULT_MODEL = model
+        os.environ["LEXINVO_GPT_MODEL"] = model
+
+
 @app.get("/")
 def index():
-    default_model = os.getenv("LEXINVO_GPT_MODEL", "gpt-4o-mini")
+    default_model = _DEFAULT_MODEL
     return render_template(
         "index.html",
         model_choices=MODEL_CHOICES,
@@ -307,53 +447,76 @@ def index():
 
 @app.post("/run")
 def run():
-    upload = request.files.get("azure_json")
-    json_path = None
-    if upload and upload.filename:
-        INPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        upload.save(INPUT_PATH)
-        json_path = str(INPUT_PATH)
-    pdf_upload = request.files.get("invoice_pdf")
-    pdf_path = None
-    if pdf_upload and pdf_upload.filename:
-        INPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        pdf_upload.save(PDF_PATH)
-        pdf_path = str(PDF_PATH)
-
-    selected_model = request.form.get("gpt_model")
-    if selected_model in MODEL_CHOICES:
-        os.environ["LEXINVO_GPT_MODEL"] = selected_model
-
-    run_pipeline(
-        input_path=json_path,
-        output_dir=str(OUTPUT_DIR),
-        config_dir=str(CONFIG_DIR),
-        data_dir=str(DATA_DIR),
-        pdf_path=pdf_path,
-    )
-
+    if not _claim_job():
+        return _busy_response(
+            "A run is already in progress; your upload was not processed. "
+            "Submit it again once the current run has finished."
+        )
+    try:
+        upload = request.files.get("azure_json")
+        json_path = None
+        if upload and upload.filename:
+            INPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            upload.save(INPUT_PATH)
+            json_path = str(INPUT_PATH)
+        pdf_upload = request.files.get("invoice_pdf")
+        pdf_path = None
+        if pdf_upload and pdf_upload.filename:
+            INPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            pdf_upload.save(PDF_PATH)
+            pdf_path = str(PDF_PATH)
+
+        selected_model = request.form.get("gpt_model")
+        if selected_model in MODEL_CHOICES:
+            _set_default_model(selected_model)
+
+        _submit_pipeline(json_path, pdf_path).add_done_callback(_job_done)
+    except BaseException as exc:
+        _finish_job(exc)
+        raise
+
+    return redirect(url_for("status"))
+
+
+@app.get("/status")
+def status():
+    with _JOB_LOCK:
+        job = dict(_JOB)
+    if job["status"] in {"running", "error"}:
+        return render_template("status.html", job=job)
     return redirect(url_for("success"))
 
 
+_SUCCESS_TEMPLATE = None
+
+
+def _success_template():
+    # Resolved once; with auto_reload (debug) Jinja keeps checking the file instead.
+    global _SUCCESS_TEMPLATE
+    if _SUCCESS_TEMPLATE is None or app.jinja_env.auto_reload:
+        _SUCCESS_TEMPLATE = app.jinja_env.get_template("success.html")
+    return _SUCCESS_TEMPLATE
+
+
 @app.get("/success")
 def success():
-    outputs = {}
-    for key, filename in OUTPUT_FILES.items():
-        outputs[key] = _read_json(OUTPUT_DIR / filename)
+    paths = [OUTPUT_DIR / OUTPUT_FILES[key] for key in SUCCESS_OUTPUTS]
+    outputs = dict(zip(SUCCESS_OUTPUTS, _read_json_files(paths)))
 
     canonical = outputs.get("canonical_invoice", {})
     registry = _read_registry()
     corrections = _build_corrections(outputs.get("corrections_report", {}))
     relevant = _build_relevant(canonical)
     all_rows = _build_all_rows(canonical, registry)
-    feedbacks = _read_json(FEEDBACK_PATH) if FEEDBACK_PATH.exists() else {}
+    feedbacks = _read_json(FEEDBACK_PATH)
     if isinstance(feedbacks, dict):
-        for fb_key, fb_value in list(feedbacks.items()):
-            if isinstance(fb_value, str):
-                feedbacks[fb_key] = {"status": fb_value}
+        feedbacks = {
+            fb_key: {"status": fb_value} if isinstance(fb_value, str) else fb_value
+            for fb_key, fb_value in feedbacks.items()
+        }
 
     return render_template(
-        "success.html",
+        _success_template(),
         corrections=corrections,
         relevant=relevant,
         all_rows=all_rows,
@@ -363,38 +526,42 @@ def success():
 
 @app.post("/feedback")
 def feedback():
-    feedbacks: Dict[str, Dict[str, str]] = {}
-    for key, value in request.form.items():
-        if not key.startswith("feedback__"):
-            continue
-        feedback_key = key.replace("feedback__", "", 1)
-        feedbacks.setdefault(feedback_key, {})["status"] = value
+    feedbacks: Dict[str, Dict[str, str]] = defaultdict(dict)
     for key, value in request.form.items():
-        if not key.startswith("correct__"):
-            continue
-        feedback_key = key.replace("correct__", "", 1)
-        if value:
-            feedbacks.setdefault(feedback_key, {})["correct_value"] = value
+        if key[:10] == "feedback__":
+            feedbacks[key[10:]]["status"] = value
+        elif key[:9] == "correct__" and value:
+            feedbacks[key[9:]]["correct_value"] = value
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    FEEDBACK_PATH.write_text(json.dumps(feedbacks, indent=2, ensure_ascii=True), encoding="utf-8")
+    _write_json(FEEDBACK_PATH, feedbacks, durable=True)
     return redirect(url_for("success"))
 
 
+def _feedback_after_run(future: Future) -> None:
+    # Feedback is replayed only onto outputs of a run that succeeded.
+    if future.exception() is None:
+        try:
+            _apply_feedback_to_outputs()
+        except Exception as exc:
+            app.logger.error("Applying feedback failed", exc_info=exc)
+            _finish_job(exc)
+            return
+    _job_done(future)
+
+
 @app.post("/rerun")
 def rerun():
+    if not _claim_job():
+        return _busy_response("A run is already in progress; the rerun was not started.")
     json_path = str(INPUT_PATH) if INPUT_PATH.exists() else None
     pdf_path = str(PDF_PATH) if PDF_PATH.exists() else None
 
-    run_pipeline(
-        input_path=json_path,
-        output_dir=str(OUTPUT_DIR),
-        config_dir=str(CONFIG_DIR),
-        data_dir=str(DATA_DIR),
-        pdf_path=pdf_path,
-    )
-
-    _apply_feedback_to_outputs()
-    return redirect(url_for("success"))
+    try:
+        _submit_pipeline(json_path, pdf_path).add_done_callback(_feedback_after_run)
+    except BaseException as exc:
+        _finish_job(exc)
+        raise
+    return redirect(url_for("status"))
 
 
 @app.get("/download/en16931_basic")
@@ -402,8 +569,17 @@ def download_en16931_basic():
     path = OUTPUT_DIR / OUTPUT_FILES["en16931_basic"]
     if not path.exists():
         return redirect(url_for("success"))
-    return send_file(path, as_attachment=True, download_name="en16931_basic.json")
+    if XACCEL_PREFIX:
+        return Response(
+            status=200,
+            headers={
+                "X-Accel-Redirect": f"{XACCEL_PREFIX}/{path.name}",
+                "Content-Type": "application/json",
+                "Content-Disposition": f"attachment; filename={path.name}",
+            },
+        )
+    return send_file(path, as_attachment=True, download_name="en16931_basic.json", conditional=True, max_age=60)
 
 
 if __name__ == "__main__":
-    app.run(debug=True, port=8000)
+    app.run(debug=os.getenv("LEXINVO_DEBUG", "").lower() in {"1", "true", "yes"}, port=8000)